@@ -1,18 +1,61 @@
 import argparse
 import csv
-import datetime
+import glob
+import importlib.util
+import io
 import os
 import platform
 import re
+import shutil
 import subprocess
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader, Template
 
 # WeasyPrint выбран как простая библиотека для HTML→PDF, устанавливается через pip;
 # при отсутствии системных зависимостей выводим подсказку и не продолжаем рендер.
+# Для одностраничных чеков быстрее wkhtmltopdf: если он доступен, по умолчанию
+# используется он; xhtml2pdf — только по явному выбору (см. --engine).
+ENGINES = ("weasyprint", "wkhtmltopdf", "xhtml2pdf")
+
+# Плейсхолдеры фиксированы, поэтому регулярки собираем один раз при импорте:
+# первая находит выражения {{ ... }} за один проход по шаблону,
+# вторая ищет обязательные имена внутри найденного выражения.
+_PLACEHOLDER_NAMES = ("product", "price", "qty", "total")
+_PLACEHOLDER_RE = re.compile(r"{{([^}]*)}}")
+# Префикс вида item. отдельно не описываем: \b срабатывает и сразу после точки.
+_PLACEHOLDER_NAME_RE = re.compile(r"\b(?P<n>" + "|".join(_PLACEHOLDER_NAMES) + r")\b")
+
+# Сколько байт из начала CSV читаем для проверки на пустоту и определения разделителя.
+_SNIFF_SIZE = 64 * 1024
+
+# Цена: целая часть и до двух знаков после точки; считаем в целых копейках.
+_PRICE_RE = re.compile(r"(\d+)(?:\.(\d{1,2}))?", re.ASCII)
+_PRICE_TOO_PRECISE_RE = re.compile(r"\d+\.\d{3,}", re.ASCII)
+_QTY_RE = re.compile(r"\d+", re.ASCII)
+
+# Внешние стили, которые не нужны в PDF (экранные бандлы, шрифты и т.п.),
+# вырезаем до рендера, чтобы WeasyPrint их не скачивал и не разбирал.
+_LINK_TAG_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_STYLESHEET_REL_RE = re.compile(r"""(?<![\w-])rel\s*=\s*["']?stylesheet\b""", re.IGNORECASE)
+_PDF_SKIP_RE = re.compile(r"""(?<![\w-])data-pdf\s*=\s*["']?skip\b""", re.IGNORECASE)
+_HREF_RE = re.compile(r"""(?<![\w-])href\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+
+# Встроенные <style> без Jinja-разметки разбираем в CSS один раз на шаблон,
+# а не заново для каждого PDF.
+_STYLE_BLOCK_RE = re.compile(r"<style\s*>(.*?)</style\s*>", re.IGNORECASE | re.DOTALL)
+
+# Простой шаблон чека — один цикл по items и подстановки вида {{ name }} / {{ item.name }} —
+# рендерим через str.format_map, остальные шаблоны отдаём Jinja.
+_FOR_ITEMS_RE = re.compile(r"{%\s*for\s+(\w+)\s+in\s+items\s*%}(.*?){%\s*endfor\s*%}", re.DOTALL)
+_SIMPLE_VAR_RE = re.compile(r"{{\s*(?:(\w+)\.)?(\w+)\s*}}")
+_NEWLINE_RE = re.compile(r"\r\n|\r|\n")
+_FAST_CONTEXT_NAMES = frozenset(("total", "generated_at"))
+_FAST_ITEM_NAMES = frozenset(("product", "price", "qty", "line_total"))
 
 
 class CliError(Exception):
@@ -27,7 +70,10 @@ def parse_arguments() -> argparse.Namespace:
         "-i",
         "--input",
         default="data/input.csv",
-        help="Путь к CSV с покупками (дефолт: data/input.csv).",
+        help=(
+            "Путь к CSV с покупками или glob-шаблон для пакетной обработки, "
+            "например 'data/*.csv' (дефолт: data/input.csv)."
+        ),
     )
     parser.add_argument(
         "-t",
@@ -49,144 +95,505 @@ def parse_arguments() -> argparse.Namespace:
         action="store_true",
         help="Открыть PDF после генерации системной командой.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Число процессов для пакетной обработки; 0 — по числу ядер (дефолт: 1).",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("auto",) + ENGINES,
+        default="auto",
+        help=(
+            "Движок HTML→PDF. auto берёт wkhtmltopdf, если он есть в PATH, иначе WeasyPrint; "
+            "xhtml2pdf — только явно и со шрифтом с кириллицей в шаблоне (дефолт: auto)."
+        ),
+    )
+    args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error("--jobs не может быть отрицательным.")
+    return args
 
 
 def detect_delimiter(sample: str) -> str:
-    """Определяем разделитель из запятой или точки с запятой, иначе ошибка."""
+    """Определяем разделитель из запятой или точки с запятой по строке заголовков, иначе ошибка.
+
+    Переменная окружения CSV2PDF_DELIM задаёт разделитель явно и отключает определение.
+    """
     possible = [",", ";"]
-    try:
-        dialect = csv.Sniffer().sniff(sample, delimiters="".join(possible))
-        delimiter = dialect.delimiter
-    except csv.Error:
-        delimiter = None
-    if delimiter in possible:
-        return delimiter
+    forced = os.environ.get("CSV2PDF_DELIM")
+    if forced:
+        if forced in possible:
+            return forced
+        raise CliError(f"CSV2PDF_DELIM должен быть ',' или ';', получено: {forced!r}")
+    header_line = sample.partition("\n")[0]
+    commas = header_line.count(",")
+    semicolons = header_line.count(";")
+    if commas or semicolons:
+        return "," if commas >= semicolons else ";"
     raise CliError(
         "Не удалось определить разделитель CSV. Поддерживаются ',' или ';'. "
         "Проверьте файл или укажите корректный разделитель."
     )
 
 
-def parse_price(raw: str) -> Decimal:
-    """Парсинг цены с валидацией формата и неотрицательности."""
-    text = (raw or "").strip()
-    if not text:
-        raise CliError("Цена не указана для одной из строк.")
-    if "," in text and "." not in text:
-        raise CliError("Цена должна использовать точку в качестве десятичного разделителя, не запятую.")
-    try:
-        value = Decimal(text)
-    except InvalidOperation:
+def parse_price_cents(text: str) -> int:
+    """Парсинг цены в целые копейки с валидацией формата и неотрицательности.
+
+    Ожидает значение без пробелов по краям — их срезает вызывающий код.
+    """
+    match = _PRICE_RE.fullmatch(text)
+    if not match:
+        # Разбираем причину только для некорректных значений, корректные проходят одной проверкой.
+        if not text:
+            raise CliError("Цена не указана для одной из строк.")
+        if "," in text and "." not in text:
+            raise CliError("Цена должна использовать точку в качестве десятичного разделителя, не запятую.")
+        if text.startswith("-") and _PRICE_RE.fullmatch(text[1:]):
+            raise CliError(f"Цена не может быть отрицательной: {text}")
+        if _PRICE_TOO_PRECISE_RE.fullmatch(text):
+            raise CliError(f"Некорректное значение цены (не более двух знаков после точки): {text}")
         raise CliError(f"Некорректное значение цены: {text}")
-    if value < 0:
-        raise CliError(f"Цена не может быть отрицательной: {text}")
-    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    whole, frac = match.groups()
+    return int(whole) * 100 + int((frac or "").ljust(2, "0"))
+
 
+def format_cents(cents: int) -> str:
+    """Форматирует сумму в копейках как строку с двумя знаками после точки."""
+    return f"{cents // 100}.{cents % 100:02d}"
 
-def parse_qty(raw: str) -> int:
-    """Парсинг количества с проверкой неотрицательности и целочисленности."""
-    text = (raw or "").strip()
-    if not text:
-        raise CliError("Количество не указано для одной из строк.")
-    if not text.isdigit():
+
+def parse_qty(text: str) -> int:
+    """Парсинг количества с проверкой неотрицательности и целочисленности.
+
+    Ожидает значение без пробелов по краям — их срезает вызывающий код.
+    """
+    if not _QTY_RE.fullmatch(text):
+        if not text:
+            raise CliError("Количество не указано для одной из строк.")
         raise CliError(f"Количество должно быть неотрицательным целым: {text}")
-    qty = int(text)
-    return qty
+    return int(text)
 
 
-def read_csv_rows(csv_path: Path) -> Tuple[List[dict], Decimal]:
-    """Читает CSV, валидирует колонки и значения, возвращает позиции и итог."""
+def read_csv_rows(csv_path: Path) -> Tuple[List[dict], int]:
+    """Читает CSV, валидирует колонки и значения, возвращает позиции и итог в копейках."""
     if not csv_path.exists():
         raise CliError(f"Файл CSV не найден: {csv_path}")
-    sample = csv_path.read_text(encoding="utf-8", errors="ignore")
-    if not sample.strip():
-        raise CliError("CSV пустой. Добавьте данные и повторите попытку.")
-    delimiter = detect_delimiter(sample)
-    with csv_path.open(newline="", encoding="utf-8") as fh:
-        reader = csv.DictReader(fh, delimiter=delimiter)
-        if not reader.fieldnames:
+    with csv_path.open("rb") as raw:
+        # Разделитель определяем по началу файла, затем читаем тот же дескриптор заново.
+        head = raw.read(_SNIFF_SIZE)
+        if not head.strip():
+            raise CliError("CSV пустой. Добавьте данные и повторите попытку.")
+        # Окно может разрезать многобайтовый символ на границе; разделителю это не мешает.
+        delimiter = detect_delimiter(head.decode("utf-8", errors="ignore"))
+        raw.seek(0)
+        fh = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        reader = csv.reader(fh, delimiter=delimiter)
+        fieldnames = next(reader, None)
+        if not fieldnames:
             raise CliError("В CSV отсутствует строка заголовков.")
-        headers = {h.strip().lower() for h in reader.fieldnames}
-        required = {"product", "price", "qty"}
-        missing = required - headers
+        # Нормализуем заголовки один раз и дальше работаем только с индексами колонок.
+        headers = [h.strip().lower() for h in fieldnames]
+        required = ("product", "price", "qty")
+        missing = set(required) - set(headers)
         if missing:
             raise CliError(f"В CSV отсутствуют обязательные колонки: {', '.join(sorted(missing))}")
+        required_idx = {name: headers.index(name) for name in required}
+        idx_product, idx_price, idx_qty = (required_idx[name] for name in required)
+        width = max(required_idx.values()) + 1
         items = []
-        total = Decimal("0.00")
+        total_cents = 0
+        # Локальные ссылки вместо глобальных имён в цикле по строкам.
+        _parse_price = parse_price_cents
+        _parse_qty = parse_qty
+        _format = format_cents
+        _append = items.append
         for row in reader:
-            product = (row.get("product") or "").strip()
+            if not row:
+                continue
+            if len(row) < width:
+                # Короткая строка: недостающие значения считаем пустыми, как DictReader.
+                row += [""] * (width - len(row))
+            product = row[idx_product].strip()
             if not product:
                 raise CliError("Пустое значение товара в одной из строк.")
-            price = parse_price(row.get("price", ""))
-            qty = parse_qty(row.get("qty", ""))
-            line_total = (price * qty).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            total += line_total
-            items.append(
+            price_cents = _parse_price(row[idx_price].strip())
+            qty = _parse_qty(row[idx_qty].strip())
+            line_cents = price_cents * qty
+            total_cents += line_cents
+            _append(
                 {
                     "product": product,
-                    "price": f"{price:.2f}",
+                    "price": _format(price_cents),
                     "qty": qty,
-                    "line_total": f"{line_total:.2f}",
+                    "line_total": _format(line_cents),
                 }
             )
         if not items:
             raise CliError("CSV не содержит данных после заголовков.")
-        total = total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        return items, total
+        return items, total_cents
 
 
 def ensure_placeholders(template_text: str) -> None:
     """Проверяем наличие ключевых плейсхолдеров; допускаем точку перед именем."""
-    required_names = ["product", "price", "qty", "total"]
-    for name in required_names:
-        pattern = re.compile(r"{{[^}]*\b(?:\w+\.)?" + re.escape(name) + r"\b[^}]*}}")
-        if not pattern.search(template_text):
+    found = {
+        name_match.group("n")
+        for match in _PLACEHOLDER_RE.finditer(template_text)
+        for name_match in _PLACEHOLDER_NAME_RE.finditer(match.group(1))
+    }
+    for name in _PLACEHOLDER_NAMES:
+        if name not in found:
             raise CliError(
                 f"В шаблоне отсутствует плейсхолдер для '{name}'. "
                 "Добавьте его и повторите генерацию."
             )
 
 
-def load_template(template_path: Path) -> Template:
+def strip_skipped_links(html_content: str) -> str:
+    """Убирает из HTML внешние стили, ненужные для PDF.
+
+    Удаляются <link rel="stylesheet"> с атрибутом data-pdf="skip", а также ссылки,
+    чей href подходит под регулярное выражение из переменной CSV2PDF_STRIP_LINKS.
+    """
+    pattern_text = os.environ.get("CSV2PDF_STRIP_LINKS")
+    href_pattern = None
+    if pattern_text:
+        try:
+            href_pattern = re.compile(pattern_text)
+        except re.error as exc:
+            raise CliError(f"Некорректное регулярное выражение в CSV2PDF_STRIP_LINKS: {exc}") from exc
+
+    def replace(match: "re.Match[str]") -> str:
+        tag = match.group(0)
+        if not _STYLESHEET_REL_RE.search(tag):
+            return tag
+        if _PDF_SKIP_RE.search(tag):
+            return ""
+        if href_pattern is not None:
+            href = _HREF_RE.search(tag)
+            if href and href_pattern.search(href.group(1)):
+                return ""
+        return tag
+
+    return _LINK_TAG_RE.sub(replace, html_content)
+
+
+def extract_styles(template_text: str) -> Tuple[str, List[str]]:
+    """Вынимает из шаблона статичные <style>, возвращает шаблон без них и их CSS.
+
+    WeasyPrint применяет вынесенные стили как пользовательские: они проигрывают любым
+    авторским стилям страницы, а их !important, наоборот, выигрывает. Поэтому выносим
+    только тогда, когда конкурировать не с чем и ничто не включает стили по условию:
+    нет <link>, HTML- и Jinja-комментариев, <style> с атрибутами или Jinja внутри,
+    !important, а из управляющих блоков Jinja есть только один цикл по items
+    без <style> внутри. Иначе шаблон остаётся как есть.
+    """
+    unchanged: Tuple[str, List[str]] = (template_text, [])
+    lowered = template_text.lower()
+    if "<link" in lowered or "<!--" in lowered or "{#" in template_text:
+        return unchanged
+    loop = _FOR_ITEMS_RE.search(template_text)
+    outside = template_text
+    if loop is not None:
+        if "<style" in loop.group(2).lower():
+            return unchanged
+        outside = template_text[:loop.start()] + template_text[loop.end():]
+    if "{%" in outside:
+        return unchanged
+    blocks = list(_STYLE_BLOCK_RE.finditer(template_text))
+    if len(blocks) != lowered.count("<style"):
+        return unchanged
+    styles = [match.group(1) for match in blocks]
+    for css_text in styles:
+        if "{{" in css_text or "{%" in css_text or "!important" in css_text.lower():
+            return unchanged
+    return _STYLE_BLOCK_RE.sub("", template_text), styles
+
+
+class FastTemplate:
+    """Шаблон чека, заранее разобранный на шапку, строку позиции и подвал для str.format_map."""
+
+    def __init__(self, header: str, row: str, footer: str) -> None:
+        self._header = header
+        self._row = row
+        self._footer = footer
+
+    def render(self, items: Iterable[dict] = (), **context: str) -> str:
+        row = self._row
+        return (
+            self._header.format_map(context)
+            + "".join([row.format_map(item) for item in items])
+            + self._footer.format_map(context)
+        )
+
+
+ReceiptTemplate = Union[Template, FastTemplate]
+
+
+def _escape_format(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _to_format_string(text: str, loop_var: Optional[str]) -> Optional[str]:
+    """Переводит кусок шаблона в строку для format_map; None, если нужна Jinja."""
+    # Что-то кроме простых подстановок (фильтры, условия, комментарии) — не наш случай.
+    rest = _SIMPLE_VAR_RE.sub("\0", text)
+    if "{{" in rest or "{%" in rest or "{#" in rest:
+        return None
+    allowed = _FAST_CONTEXT_NAMES if loop_var is None else _FAST_ITEM_NAMES
+    parts = []
+    pos = 0
+    for match in _SIMPLE_VAR_RE.finditer(text):
+        owner, name = match.groups()
+        if owner != loop_var or name not in allowed:
+            return None
+        parts.append(_escape_format(text[pos:match.start()]))
+        parts.append("{" + name + "}")
+        pos = match.end()
+    parts.append(_escape_format(text[pos:]))
+    return "".join(parts)
+
+
+def compile_fast_template(template_text: str) -> Optional[FastTemplate]:
+    """Собирает FastTemplate для простого шаблона чека; для остальных возвращает None.
+
+    Повторяет поведение Jinja по умолчанию: переводы строк приводятся к \\n,
+    один завершающий перевод строки отбрасывается, экранирования нет.
+    """
+    lines = _NEWLINE_RE.split(template_text)
+    if lines[-1] == "":
+        del lines[-1]
+    text = "\n".join(lines)
+    loop = _FOR_ITEMS_RE.search(text)
+    if loop is None:
+        return None
+    header = _to_format_string(text[:loop.start()], None)
+    row = _to_format_string(loop.group(2), loop.group(1))
+    footer = _to_format_string(text[loop.end():], None)
+    if header is None or row is None or footer is None:
+        return None
+    return FastTemplate(header, row, footer)
+
+
+def _template_cache_dir() -> Optional[Path]:
+    """Каталог пользовательского кеша для байткода шаблонов; None, если писать туда нельзя."""
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+    elif platform.system() == "Darwin":
+        base = str(Path.home() / "Library" / "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    cache_dir = Path(base) / "csv2pdf"
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return cache_dir if os.access(cache_dir, os.W_OK) else None
+
+
+def compile_jinja_template(template_text: str, template_path: Path) -> Template:
+    """Компилирует шаблон Jinja, сохраняя байткод на диске между запусками CLI.
+
+    Ключ кеша — путь к шаблону и контрольная сумма его текста, так что
+    изменённый шаблон перекомпилируется сам. Без доступного каталога кеша
+    компилируем как раньше, в памяти.
+    """
+    cache_dir = _template_cache_dir()
+    if cache_dir is None:
+        return Template(template_text)
+    env = Environment(
+        loader=FunctionLoader(lambda name: template_text),
+        bytecode_cache=FileSystemBytecodeCache(str(cache_dir)),
+    )
+    try:
+        return env.get_template(str(template_path.resolve()))
+    except OSError:
+        # Запись в кеш может упасть и после проверок (диск заполнен, квота, read-only);
+        # из-за кеша рендер не прерываем.
+        return Template(template_text)
+
+
+def load_template(template_path: Path, split_styles: bool = True) -> Tuple[ReceiptTemplate, List[str]]:
+    """Загружает и проверяет шаблон; статичные стили при split_styles возвращает отдельно."""
     if not template_path.exists():
         raise CliError(f"Шаблон не найден: {template_path}")
     text = template_path.read_text(encoding="utf-8")
     ensure_placeholders(text)
-    return Template(text)
+    styles: List[str] = []
+    if split_styles:
+        text, styles = extract_styles(text)
+    return compile_fast_template(text) or compile_jinja_template(text, template_path), styles
 
 
-def render_pdf(html_content: str, output_dir: Path) -> Path:
-    output_dir.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = output_dir / f"check_{timestamp}.pdf"
-    try:
-        from weasyprint import HTML
-    except Exception as exc:
+# WeasyPrint импортируем лениво и один раз на процесс: импорт тяжёлый (Pango/Cairo).
+# Без него обходятся `--help`, ошибки аргументов и, в одиночном режиме, ошибки CSV:
+# файл читается до подготовки шаблона. В пакетном режиме шаблон со стилями готовится
+# до первого CSV, и импорт происходит сразу. Неудачу импорта тоже запоминаем.
+_weasyprint = None
+_weasyprint_error: Optional[Exception] = None
+
+
+def _import_weasyprint():
+    global _weasyprint, _weasyprint_error
+    if _weasyprint is None and _weasyprint_error is None:
+        try:
+            import weasyprint
+        except Exception as exc:
+            _weasyprint_error = exc
+        else:
+            _weasyprint = weasyprint
+    if _weasyprint is None:
         raise CliError(
             "Не удалось импортировать WeasyPrint. Убедитесь, что библиотека установлена и "
             "доступны системные зависимости (GTK/Pango/Cairo)."
-        ) from exc
+        ) from _weasyprint_error
+    return _weasyprint
+
+
+# Без явной конфигурации WeasyPrint заново собирает список системных шрифтов
+# (fontconfig) для каждого документа; одну конфигурацию держим на весь процесс.
+_font_config = None
+
+
+def _get_font_config():
+    global _font_config
+    if _font_config is None:
+        _import_weasyprint()
+        from weasyprint.text.fonts import FontConfiguration
+
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+def load_stylesheets(styles: Sequence[str]) -> list:
+    """Разбирает CSS шаблона в объекты WeasyPrint, чтобы переиспользовать их для всех PDF."""
+    if not styles:
+        return []
+    weasyprint = _import_weasyprint()
     try:
-        HTML(string=html_content).write_pdf(str(output_path))
+        font_config = _get_font_config()
+        return [weasyprint.CSS(string=css_text, font_config=font_config) for css_text in styles]
+    except Exception as exc:
+        raise CliError("Не удалось разобрать стили шаблона. Проверьте блоки <style>.") from exc
+
+
+def resolve_engine(name: str) -> str:
+    """Возвращает движок для рендера: для auto — wkhtmltopdf, если он есть, иначе WeasyPrint.
+
+    xhtml2pdf автоматически не выбираем: без подключённых шрифтов он рисует только
+    базовыми шрифтами PDF, в которых нет кириллицы, — русский чек выйдет квадратиками.
+    """
+    wkhtmltopdf_found = shutil.which("wkhtmltopdf") is not None
+    if name == "auto":
+        return "wkhtmltopdf" if wkhtmltopdf_found else "weasyprint"
+    if name == "wkhtmltopdf" and not wkhtmltopdf_found:
+        raise CliError("wkhtmltopdf не найден в PATH. Установите его или выберите другой --engine.")
+    if name == "xhtml2pdf" and importlib.util.find_spec("xhtml2pdf") is None:
+        raise CliError("xhtml2pdf не установлен. Выполните `pip install xhtml2pdf` или выберите другой --engine.")
+    return name
+
+
+def prepare_template(template_path: Path, engine: str) -> Tuple[ReceiptTemplate, list]:
+    """Загружает шаблон под движок; стили заранее разбираются только для WeasyPrint."""
+    template, styles = load_template(template_path, split_styles=engine == "weasyprint")
+    return template, load_stylesheets(styles)
+
+
+def render_pdf_weasy(html_content: str, output_path: Path, stylesheets: Sequence = ()) -> None:
+    weasyprint = _import_weasyprint()
+    try:
+        weasyprint.HTML(string=html_content).write_pdf(
+            str(output_path),
+            stylesheets=list(stylesheets),
+            font_config=_get_font_config(),
+        )
     except Exception as exc:
         raise CliError(
             "Рендер PDF не удался. Проверьте установку системных зависимостей WeasyPrint "
             "и корректность шаблона."
         ) from exc
+
+
+def render_pdf_wk(html_content: str, output_path: Path) -> None:
+    """Рендер через wkhtmltopdf: HTML передаём в stdin, без доступа к локальным файлам."""
+    try:
+        subprocess.run(
+            [
+                "wkhtmltopdf",
+                "--quiet",
+                "--encoding",
+                "utf-8",
+                "--disable-local-file-access",
+                "-",
+                str(output_path),
+            ],
+            input=html_content.encode("utf-8"),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.CalledProcessError) as exc:
+        # Упавший wkhtmltopdf мог успеть записать часть файла — не оставляем его.
+        output_path.unlink(missing_ok=True)
+        raise CliError("Рендер PDF через wkhtmltopdf не удался. Проверьте установку wkhtmltopdf и шаблон.") from exc
+
+
+def render_pdf_xhtml2pdf(html_content: str, output_path: Path) -> None:
+    try:
+        from xhtml2pdf import pisa
+    except Exception as exc:
+        raise CliError("Не удалось импортировать xhtml2pdf. Убедитесь, что библиотека установлена.") from exc
+    # Рендерим в память и пишем файл только при успехе, чтобы не оставлять пустой или битый PDF.
+    buffer = io.BytesIO()
+    try:
+        status = pisa.CreatePDF(html_content, dest=buffer, encoding="utf-8")
+    except Exception as exc:
+        raise CliError("Рендер PDF через xhtml2pdf не удался. Проверьте корректность шаблона.") from exc
+    if status.err:
+        raise CliError("Рендер PDF через xhtml2pdf не удался. Проверьте корректность шаблона.")
+    output_path.write_bytes(buffer.getvalue())
+
+
+def render_pdf(
+    html_content: str,
+    output_dir: Path,
+    timestamp: str,
+    engine: str = "weasyprint",
+    stylesheets: Sequence = (),
+    name_suffix: str = "",
+) -> Path:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"check_{timestamp}{name_suffix}.pdf"
+    html_content = strip_skipped_links(html_content)
+    if engine == "wkhtmltopdf":
+        render_pdf_wk(html_content, output_path)
+    elif engine == "xhtml2pdf":
+        render_pdf_xhtml2pdf(html_content, output_path)
+    else:
+        render_pdf_weasy(html_content, output_path, stylesheets)
     return output_path
 
 
 def open_pdf(path: Path) -> None:
-    """Открывает PDF системной командой, предупреждает при сбоях."""
+    """Открывает PDF системной командой, предупреждает при сбоях.
+
+    Команду не ждём: xdg-open/open на некоторых окружениях возвращаются заметно позже,
+    а CLI к этому моменту уже всё сделал.
+    """
     try:
         if platform.system() == "Windows":
             os.startfile(path)  # type: ignore[attr-defined]
-        elif platform.system() == "Darwin":
-            subprocess.run(["open", str(path)], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         else:
-            subprocess.run(["xdg-open", str(path)], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except Exception:
+            opener = "open" if platform.system() == "Darwin" else "xdg-open"
+            subprocess.Popen(
+                [opener, str(path)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+    except OSError:
         print(
             "Предупреждение: не удалось открыть PDF автоматически. "
             f"Файл сохранен: {path}",
@@ -194,30 +601,182 @@ def open_pdf(path: Path) -> None:
         )
 
 
-def build_html(template: Template, items: Iterable[dict], total: Decimal) -> str:
+def build_html(template: ReceiptTemplate, items: Iterable[dict], total_cents: int, generated_at: str) -> str:
     """Готовим HTML из шаблона и данных."""
     return template.render(
         items=list(items),
-        total=f"{total:.2f}",
-        generated_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        total=format_cents(total_cents),
+        generated_at=generated_at,
     )
 
 
+def is_batch_input(value: str) -> bool:
+    """Пакетный режим — только если такого файла нет, а в строке есть символы glob."""
+    if Path(value).exists():
+        return False
+    return any(ch in value for ch in "*?[")
+
+
+def resolve_inputs(pattern: str) -> List[Path]:
+    """Раскрывает glob-шаблон в список CSV."""
+    paths = sorted(Path(p) for p in glob.glob(pattern))
+    if not paths:
+        raise CliError(f"По шаблону не найдено ни одного CSV: {pattern}")
+    return paths
+
+
+def process_one(
+    csv_path: Path,
+    template: ReceiptTemplate,
+    stylesheets: Sequence,
+    output_dir: Path,
+    engine: str = "weasyprint",
+    name_suffix: str = "",
+) -> Path:
+    """Полный цикл для одного CSV с уже подготовленными шаблоном и стилями."""
+    items, total_cents = read_csv_rows(csv_path)
+    return render_receipt(items, total_cents, template, stylesheets, output_dir, engine, name_suffix)
+
+
+def render_receipt(
+    items: List[dict],
+    total_cents: int,
+    template: ReceiptTemplate,
+    stylesheets: Sequence,
+    output_dir: Path,
+    engine: str = "weasyprint",
+    name_suffix: str = "",
+) -> Path:
+    """Собирает HTML из уже прочитанных позиций и рендерит PDF."""
+    # Одно время на CSV: имя файла и дата в чеке всегда совпадают.
+    now = time.localtime()
+    html_content = build_html(template, items, total_cents, time.strftime("%Y-%m-%d %H:%M:%S", now))
+    timestamp = time.strftime("%Y%m%d_%H%M%S", now)
+    return render_pdf(html_content, output_dir, timestamp, engine, stylesheets, name_suffix)
+
+
+def batch_name_suffixes(csv_paths: Sequence[Path]) -> List[str]:
+    """Суффиксы имён PDF для пакета, уникальные в пределах запуска.
+
+    Обычно это имя CSV; при совпадении добавляется имя папки, а если и его мало — номер.
+    Сравнение без учёта регистра, чтобы файлы не затирали друг друга и на Windows/macOS.
+    """
+    taken = set()
+    suffixes = []
+    for csv_path in csv_paths:
+        suffix = f"_{csv_path.stem}"
+        if suffix.lower() in taken and csv_path.parent.name:
+            suffix = f"_{csv_path.parent.name}_{csv_path.stem}"
+        base = suffix
+        counter = 2
+        while suffix.lower() in taken:
+            suffix = f"{base}_{counter}"
+            counter += 1
+        taken.add(suffix.lower())
+        suffixes.append(suffix)
+    return suffixes
+
+
+def _process_reporting(
+    csv_path: Path,
+    name_suffix: str,
+    template: ReceiptTemplate,
+    stylesheets: Sequence,
+    output_dir: Path,
+    engine: str,
+) -> Tuple[Optional[Path], str]:
+    """Обрабатывает CSV пакета; вместо исключения возвращает текст ошибки."""
+    try:
+        return process_one(csv_path, template, stylesheets, output_dir, engine, name_suffix), ""
+    except CliError as err:
+        return None, f"Ошибка ({csv_path}): {err}"
+    except Exception as err:
+        return None, f"Неожиданная ошибка ({csv_path}): {err}"
+
+
+# Шаблон и стили процесса-воркера: объекты Jinja и WeasyPrint не передаются
+# между процессами, поэтому каждый воркер готовит их сам один раз.
+_worker_state: Optional[Tuple[ReceiptTemplate, list, str]] = None
+
+
+def _init_worker(template_path: Path, engine: str) -> None:
+    global _worker_state
+    template, stylesheets = prepare_template(template_path, engine)
+    _worker_state = (template, stylesheets, engine)
+
+
+def _worker(csv_path: Path, name_suffix: str, output_dir: Path) -> Tuple[Optional[Path], str]:
+    template, stylesheets, engine = _worker_state
+    return _process_reporting(csv_path, name_suffix, template, stylesheets, output_dir, engine)
+
+
+def main_batch(
+    csv_paths: Sequence[Path],
+    template_path: Path,
+    output_dir: Path,
+    jobs: int = 1,
+    engine: str = "weasyprint",
+) -> List[Path]:
+    """Генерирует PDF для каждого CSV; ошибка в одном файле не останавливает остальные.
+
+    Шаблон и стили готовятся один раз (при jobs != 1 — один раз на процесс).
+    К имени PDF добавляется уникальный в пакете суффикс (см. batch_name_suffixes),
+    чтобы файлы одной секунды не перезаписывали друг друга.
+    """
+    # Шаблон проверяем в основном процессе, чтобы его ошибка выводилась один раз.
+    template, stylesheets = prepare_template(template_path, engine)
+    suffixes = batch_name_suffixes(csv_paths)
+    workers = jobs or os.cpu_count() or 1
+    created = []
+    failed = 0
+
+    def report(results: Iterable[Tuple[Optional[Path], str]]) -> None:
+        nonlocal failed
+        for pdf_path, error in results:
+            if pdf_path is None:
+                failed += 1
+                print(error, flush=True)
+            else:
+                created.append(pdf_path)
+                print(f"PDF успешно создан: {pdf_path}", flush=True)
+
+    if workers > 1 and len(csv_paths) > 1:
+        # Рендер упирается в CPU одного потока, поэтому параллелим процессами.
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(csv_paths)),
+            initializer=_init_worker,
+            initargs=(template_path, engine),
+        ) as executor:
+            report(executor.map(partial(_worker, output_dir=output_dir), csv_paths, suffixes, chunksize=1))
+    else:
+        report(
+            _process_reporting(csv_path, suffix, template, stylesheets, output_dir, engine)
+            for csv_path, suffix in zip(csv_paths, suffixes)
+        )
+    if failed:
+        raise CliError(f"Не удалось обработать файлов: {failed} из {len(csv_paths)}.")
+    return created
+
+
 def main() -> None:
     args = parse_arguments()
     try:
-        csv_path = Path(args.input)
         template_path = Path(args.template_path)
         output_dir = Path(args.output_dir)
+        engine = resolve_engine(args.engine)
 
-        items, total = read_csv_rows(csv_path)
-        template = load_template(template_path)
-        html_content = build_html(template, items, total)
-        pdf_path = render_pdf(html_content, output_dir)
+        if is_batch_input(args.input):
+            pdf_paths = main_batch(resolve_inputs(args.input), template_path, output_dir, args.jobs, engine)
+        else:
+            # Сначала CSV, как и раньше: ошибки входных данных не ждут загрузки шаблона и WeasyPrint.
+            items, total_cents = read_csv_rows(Path(args.input))
+            template, stylesheets = prepare_template(template_path, engine)
+            pdf_paths = [render_receipt(items, total_cents, template, stylesheets, output_dir, engine)]
+            print(f"PDF успешно создан: {pdf_paths[0]}")
 
-        print(f"PDF успешно создан: {pdf_path}")
         if args.auto_open:
-            open_pdf(pdf_path)
+            for pdf_path in pdf_paths:
+                open_pdf(pdf_path)
     except CliError as err:
         print(f"Ошибка: {err}", flush=True)
         raise SystemExit(1)